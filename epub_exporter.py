@@ -7,20 +7,128 @@ Export EPUB files chapter by chapter to Markdown or TXT format using Pandoc
 
 import os
 import sys
-import tempfile
+import html
 import shutil
+import functools
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import click
 import ebooklib
 from ebooklib import epub
 import pypandoc
 import re
-from typing import List, Tuple, Optional
+from typing import Callable, Iterator, List, Tuple, Optional, Pattern
+
+
+# Sentinel paragraph placed between chapters when converting them in one pandoc run
+CHAPTER_SEPARATOR = "CD985272F78311"
+CHAPTER_SEPARATOR_RE = re.compile(rb'^' + CHAPTER_SEPARATOR.encode('ascii') + rb'$', re.MULTILINE)
+# Pandoc Markdown lines opening or closing a code block or a fenced div; a
+# chapter that ends inside one of these swallowed the separator
+CODE_FENCE_RE = re.compile(rb'(`{3,}|~{3,})')
+DIV_FENCE_RE = re.compile(rb':{3,}')
+
+# Chapters handed to each conversion worker before their output is written
+# and released; bounds how much chapter text export_chapters holds at once
+# (the raw EPUB items themselves stay loaded in the book until close())
+CHAPTERS_PER_WORKER = 16
+
+# Threads writing image files concurrently in _export_images
+IMAGE_WRITE_WORKERS = 8
+
+# Characters not allowed in filenames, mapped to '_'
+ILLEGAL_FILENAME_CHARS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# Precompiled regular expressions
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+TAGS_AND_NEWLINES_RE = re.compile(r'(?:<[^>]+>|\n)+')
+BLANK_LINES_RE = re.compile(r'\n\s*\n')
+# A script/style block together with its text, or any other single tag
+MARKUP_RE = re.compile(r'<(script|style)\b(?:[^>]*/>|[^>]*>.*?</\1\s*>)|<[^>]+>', re.IGNORECASE | re.DOTALL)
+NEXT_HEADING_RE = re.compile(r'<h[1-4][^>]*>')
+HEADING_BLOCK_RE = re.compile(r'<h[1-4][^>]*>(.*?)</h[1-4]>', re.IGNORECASE | re.DOTALL)
+HTML_HEADING_RE = re.compile(r'<h([1-3])[^>]*>(.*?)</h\1>', re.IGNORECASE | re.DOTALL)
+# <img> tag with its alt text (group 1, None if absent) and src (group 2)
+IMG_TAG_RE = re.compile(
+    r'<img(?:(?=[^>]*?alt=["\']([^"\']*)["\']))?[^>]*src=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE
+)
+PARENT_DIR_PREFIX_RE = re.compile(r'^(?:\.\./)+')
+
+# Patterns marking the start of the next section after a filepos anchor
+NEXT_SECTION_PATTERNS = [
+    re.compile(r'<h[1-4][^>]*>', re.IGNORECASE),  # Next heading
+    re.compile(r'id=["\']?filepos\d+["\']?', re.IGNORECASE),  # Next filepos
+    re.compile(r'<div[^>]*class=["\'][^"\']*chapter[^"\']*["\'][^>]*>', re.IGNORECASE),  # Chapter div
+]
+
+# Chapter titles are searched for in this many leading characters first
+TITLE_SEARCH_PREFIX = 8192
+
+# Patterns for extracting a title from chapter HTML
+TITLE_PATTERNS = [
+    re.compile(r'<h[1-6][^>]*>(.*?)</h[1-6]>', re.IGNORECASE | re.DOTALL),
+    re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL),
+]
+
+# Heading line patterns for splitting plain text into chapters, combined into
+# one alternation (earlier alternatives take priority, each has one title group)
+TEXT_HEADING_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in [
+    r'<h[1-3][^>]*>(.*?)</h[1-3]>',  # HTML heading tags
+    r'^#+\s+(.+)$',  # Markdown headings
+    r'^Chapter\s+\d+[:\s]*(.*)$',  # English chapter headings
+    r'^\d+[\.]\s*(.+)$',  # Numbered headings
+]), re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=4096)
+def get_anchor_pattern(anchor: str) -> Pattern:
+    """Compiled pattern for an id or name attribute with the given value"""
+    return re.compile(rf'(?:id|name)=["\']?{re.escape(anchor)}["\']?', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=4096)
+def get_id_tag_pattern(anchor: str) -> Pattern:
+    """Compiled pattern for a tag whose id attribute has the given value"""
+    return re.compile(rf'<[^>]+id=["\']?{re.escape(anchor)}["\']?[^>]*>', re.IGNORECASE)
+
+
+def markdown_blocks_closed(text: bytes) -> bool:
+    """Whether every code fence and fenced div opened in pandoc Markdown output is closed again"""
+    if b'```' not in text and b'~~~' not in text and b':::' not in text:
+        return True
+    
+    code_fence = None  # Marker of the open code block
+    div_depth = 0
+    for line in text.split(b'\n'):
+        if code_fence:
+            # Only a line of at least as many of the same characters closes it
+            stripped = line.strip()
+            if stripped.startswith(code_fence) and not stripped.strip(code_fence[:1]):
+                code_fence = None
+            continue
+        
+        fence = CODE_FENCE_RE.match(line)
+        if fence:
+            code_fence = fence.group(1)
+        elif DIV_FENCE_RE.match(line):
+            if line.strip(b': \t'):
+                div_depth += 1  # "::: {.class}" opens a div
+            elif div_depth:
+                div_depth -= 1
+            else:
+                return False  # Closes a div opened in an earlier chapter
+    
+    return code_fence is None and div_depth == 0
 
 
 class EpubExporter:
     """EPUB Exporter Class"""
     
+    __slots__ = ('epub_path', 'book', 'image_mapping',
+                 '_items_by_name', '_items_by_id', '_decoded')
+    
     def __init__(self, epub_path: str):
         """
         Initialize EPUB Exporter
@@ -30,7 +138,10 @@ class EpubExporter:
         """
         self.epub_path = Path(epub_path)
         self.book = None
-        self.temp_dir = None
+        self.image_mapping = {}  # Store mapping from original path to new path
+        self._items_by_name = {}
+        self._items_by_id = {}
+        self._decoded = None  # (file name, decoded HTML) of the last decoded item
         
         if not self.epub_path.exists():
             raise FileNotFoundError(f"EPUB file does not exist: {epub_path}")
@@ -42,6 +153,25 @@ class EpubExporter:
             print(f"✓ Successfully loaded EPUB file: {self.epub_path.name}")
         except Exception as e:
             raise Exception(f"Unable to load EPUB file: {e}")
+        
+        self._index_items()
+    
+    def _index_items(self) -> None:
+        """Index book items by filename and ID, and reset the decoded HTML cache"""
+        self._items_by_name = {}
+        self._items_by_id = {}
+        self._decoded = None
+        for item in self.book.get_items():
+            self._items_by_name[item.get_name()] = item
+            self._items_by_id[item.get_id()] = item
+    
+    def close(self) -> None:
+        """Release the loaded book and its caches (the book is reloaded on next use)"""
+        self.book = None
+        self._items_by_name = {}
+        self._items_by_id = {}
+        self._decoded = None
+        self.image_mapping = {}
     
     def get_chapters(self, debug=False) -> List[Tuple[str, str, str]]:
         """
@@ -53,13 +183,56 @@ class EpubExporter:
         Returns:
             List of (chapter_title, chapter_content, chapter_id)
         """
+        chapters = list(self._extract_chapters(debug))
+        
+        if debug:
+            # Build the report first and emit it with a single write
+            lines = [f"\n📊 Chapter Extraction Results:"]
+            for i, (title, content, chapter_id) in enumerate(chapters):
+                lines.append(f"  {i+1}. Title: {title}")
+                lines.append(f"     ID: {chapter_id}")
+                lines.append(f"     Content Length: {len(content)} characters")
+                lines.append(f"     Content Preview: {content[:100].replace(chr(10), ' ')[:50]}...")
+                lines.append("")
+            sys.stdout.write("\n".join(lines) + "\n")
+        
+        return self._split_identical_chapters(chapters, debug)
+    
+    def iter_chapters(self, debug=False) -> Iterator[Tuple[str, str, str]]:
+        """
+        Iterate over chapter contents, extracting each chapter as it is consumed
+        
+        Yields the same chapters as get_chapters(). Chapters are only held
+        back while they all repeat the first chapter's content, which is
+        needed to detect books whose TOC points every entry at one file.
+        
+        Args:
+            debug: Whether to output debug information
+        
+        Yields:
+            (chapter_title, chapter_content, chapter_id)
+        """
+        chapters = self._extract_chapters(debug)
+        
+        pending = []
+        for chapter in chapters:
+            if pending and chapter[1] != pending[0][1]:
+                # Contents differ, stream the rest as it is extracted
+                yield from pending
+                yield chapter
+                yield from chapters
+                return
+            pending.append(chapter)
+        
+        yield from self._split_identical_chapters(pending, debug)
+    
+    def _extract_chapters(self, debug=False) -> Iterator[Tuple[str, str, str]]:
+        """Extract chapters from the TOC, or from the spine if there is no TOC"""
         if not self.book:
             self.load_epub()
             
         if debug:
             self._print_epub_structure()
-            
-        chapters = []
         
         # Get book's navigation structure
         toc = self.book.toc
@@ -72,20 +245,12 @@ class EpubExporter:
             
         # If TOC structure exists, use TOC
         if toc:
-            chapters.extend(self._extract_from_toc(toc, debug))
-        else:
-            # Otherwise extract from spine
-            chapters.extend(self._extract_from_spine(spine, debug))
-        
-        if debug:
-            print(f"\n📊 Chapter Extraction Results:")
-            for i, (title, content, chapter_id) in enumerate(chapters):
-                print(f"  {i+1}. Title: {title}")
-                print(f"     ID: {chapter_id}")
-                print(f"     Content Length: {len(content)} characters")
-                print(f"     Content Preview: {content[:100].replace(chr(10), ' ')[:50]}...")
-                print()
-        
+            return self._extract_from_toc(toc, debug)
+        # Otherwise extract from spine
+        return self._extract_from_spine(spine, debug)
+    
+    def _split_identical_chapters(self, chapters: List[Tuple[str, str, str]], debug=False) -> List[Tuple[str, str, str]]:
+        """Re-split by headings when all chapters have identical content"""
         # Check if all chapter contents are identical (common issue)
         if len(chapters) > 1:
             first_content = chapters[0][1]
@@ -94,21 +259,13 @@ class EpubExporter:
                 # Try content-based chapter splitting
                 split_chapters = self._split_content_by_headings(first_content, debug)
                 if split_chapters:
-                    chapters = split_chapters
+                    return split_chapters
                     
         return chapters
     
     def _get_item_by_id(self, item_id: str):
-        """Get item by ID (compatible with different ebooklib versions)"""
-        # Try new version method
-        if hasattr(self.book, 'get_item_by_id'):
-            return self.book.get_item_by_id(item_id)
-        
-        # Fallback: iterate through all items
-        for item in self.book.get_items():
-            if item.get_id() == item_id:
-                return item
-        return None
+        """Get item by ID"""
+        return self._items_by_id.get(item_id)
     
     def _print_epub_structure(self):
         """Print detailed EPUB file structure information"""
@@ -132,11 +289,8 @@ class EpubExporter:
                 print(f"     Type: {item.get_type()}")
                 print(f"     Linear: {linear}")
                 if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    try:
-                        content = item.get_content().decode('utf-8')
-                        print(f"     Content Length: {len(content)} characters")
-                    except:
-                        print(f"     Content Length: Unable to decode")
+                    content = self._decode_item(item)
+                    print(f"     Content Length: {len(content)} characters")
                 print()
             else:
                 print(f"  {i+1}. ID: {item_id} (corresponding item not found)")
@@ -154,7 +308,7 @@ class EpubExporter:
             print(f"  Filename: {item.get_name()}")
             print(f"  Type: {item.get_type()}")
             if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                content = item.get_content().decode('utf-8')
+                content = self._decode_item(item)
                 print(f"  Content Length: {len(content)} characters")
             print()
         
@@ -176,28 +330,12 @@ class EpubExporter:
                 print(f"{indent}📄 {item.title}")
                 print(f"{indent}   href: {item.href}")
     
-    def _extract_from_toc(self, toc, debug=False) -> List[Tuple[str, str, str]]:
+    def _extract_from_toc(self, toc, debug=False) -> Iterator[Tuple[str, str, str]]:
         """Extract chapters from TOC structure"""
-        chapters = []
+        chapter_count = 0
         
         # First collect all TOC items (flat list, for getting next chapter info)
-        all_items = []
-        
-        def collect_items(item):
-            if isinstance(item, tuple):
-                section, children = item
-                if hasattr(section, 'title') and hasattr(section, 'href'):
-                    all_items.append(section)
-                if children:
-                    for child in children:
-                        collect_items(child)
-            else:
-                if hasattr(item, 'title') and hasattr(item, 'href'):
-                    all_items.append(item)
-        
-        # Collect all items
-        for item in toc:
-            collect_items(item)
+        all_items = self._flatten_toc(toc)
         
         if debug:
             print(f"\n📄 Collected {len(all_items)} TOC items")
@@ -214,18 +352,37 @@ class EpubExporter:
             
             content = self._get_item_content(item.href, next_href)
             if content:
-                title = item.title or f"Chapter {len(chapters) + 1}"
-                chapters.append((title, content, item.href))
+                chapter_count += 1
+                title = item.title or f"Chapter {chapter_count}"
                 if debug:
                     print(f"  ✓ Added chapter: {title} (length: {len(content)})")
+                yield (title, content, item.href)
             elif debug:
                 print(f"  ✗ No content")
-            
-        return chapters
     
-    def _extract_from_spine(self, spine, debug=False) -> List[Tuple[str, str, str]]:
+    def _flatten_toc(self, toc) -> list:
+        """Flatten nested TOC into a list of links in reading order"""
+        all_items = []
+        
+        # Explicit stack instead of recursion; children are pushed reversed
+        # so they are visited in document order
+        stack = list(reversed(toc))
+        while stack:
+            item = stack.pop()
+            if isinstance(item, tuple):
+                section, children = item
+                if hasattr(section, 'title') and hasattr(section, 'href'):
+                    all_items.append(section)
+                if children:
+                    stack.extend(reversed(children))
+            elif hasattr(item, 'title') and hasattr(item, 'href'):
+                all_items.append(item)
+        
+        return all_items
+    
+    def _extract_from_spine(self, spine, debug=False) -> Iterator[Tuple[str, str, str]]:
         """Extract chapters from spine"""
-        chapters = []
+        chapter_count = 0
         
         if debug:
             print(f"\n📄 Extracting chapters from Spine:")
@@ -235,13 +392,14 @@ class EpubExporter:
             
             if item and item.get_type() == ebooklib.ITEM_DOCUMENT:
                 try:
-                    content = item.get_content().decode('utf-8')
+                    content = self._decode_item(item)
                     if content.strip():
                         # Try to extract title from content
-                        title = self._extract_title_from_content(content) or f"Chapter {len(chapters) + 1}"
-                        chapters.append((title, content, item_id))
+                        title = self._extract_title_from_content(content) or f"Chapter {chapter_count + 1}"
+                        chapter_count += 1
                         if debug:
                             print(f"  ✓ Added chapter: {title} (ID: {item_id}, length: {len(content)})")
+                        yield (title, content, item_id)
                     elif debug:
                         print(f"  ✗ Empty content: {item_id}")
                 except Exception as e:
@@ -252,8 +410,6 @@ class EpubExporter:
                     print(f"  ✗ Non-document item: {item_id} (type: {item.get_type()})")
                 else:
                     print(f"  ✗ Item not found: {item_id}")
-                    
-        return chapters
     
     def _get_item_content(self, href: str, next_href: Optional[str] = None) -> Optional[str]:
         """
@@ -269,12 +425,12 @@ class EpubExporter:
         else:
             file_name, anchor = href, None
         
-        # Get complete file content
+        # Get complete file content (decoded once and shared by consecutive
+        # anchors into the same file)
+        item = self._items_by_name.get(file_name)
         full_content = None
-        for item in self.book.get_items():
-            if item.get_name() == file_name and item.get_type() == ebooklib.ITEM_DOCUMENT:
-                full_content = item.get_content().decode('utf-8')
-                break
+        if item and item.get_type() == ebooklib.ITEM_DOCUMENT:
+            full_content = self._decode_item(item)
         
         if not full_content:
             return None
@@ -286,6 +442,18 @@ class EpubExporter:
         # If has anchor, try to split content by anchor
         return self._extract_content_by_anchor(full_content, anchor, href, next_href)
     
+    def _decode_item(self, item) -> str:
+        """Decode an item's content as UTF-8, reusing the result while the same file is requested"""
+        # Only the most recent file is kept: TOC entries sharing a file are
+        # consecutive, and the previous file's text is released as soon as
+        # extraction moves on
+        name = item.get_name()
+        if self._decoded is None or self._decoded[0] != name:
+            # A stray invalid byte should not cost the whole chapter (or, on
+            # the TOC path, the whole export); it becomes U+FFFD instead
+            self._decoded = (name, item.get_content().decode('utf-8', errors='replace'))
+        return self._decoded[1]
+    
     def _extract_content_by_anchor(self, content: str, anchor: str, original_href: str, next_href: Optional[str] = None) -> str:
         """
         Extract content segment by anchor
@@ -296,8 +464,6 @@ class EpubExporter:
             original_href: Current complete link
             next_href: Next chapter link, used to determine end position
         """
-        import re
-        
         # Handle filepos type anchor
         if anchor.startswith('filepos'):
             return self._extract_by_filepos(content, anchor, original_href, next_href)
@@ -315,11 +481,8 @@ class EpubExporter:
             original_href: Current complete link
             next_href: Next chapter link
         """
-        import re
-        
         # Find anchor tag or id attribute containing this filepos
-        filepos_pattern = rf'(?:id|name)=["\']?{re.escape(anchor)}["\']?'
-        match = re.search(filepos_pattern, content, re.IGNORECASE)
+        match = get_anchor_pattern(anchor).search(content)
         
         if not match:
             # If exact anchor not found, try smart splitting
@@ -340,24 +503,18 @@ class EpubExporter:
                 current_file = original_href.split('#')[0] if '#' in original_href else original_href
                 
                 if next_file == current_file and next_anchor.startswith('filepos'):
-                    # In same file, find next anchor's position
-                    next_pattern = rf'(?:id|name)=["\']?{re.escape(next_anchor)}["\']?'
-                    next_match = re.search(next_pattern, content, re.IGNORECASE)
+                    # In same file, find next anchor's position (it follows the current one)
+                    next_match = get_anchor_pattern(next_anchor).search(content, start_pos + 1)
                     if next_match:
                         end_pos = next_match.start()
         
         # If next chapter position not found, use original heuristic method to find possible split points
         if end_pos == len(content):
-            next_section_patterns = [
-                r'<h[1-4][^>]*>',  # Next heading
-                r'id=["\']?filepos\d+["\']?',  # Next filepos
-                r'<div[^>]*class=["\'][^"\']*chapter[^"\']*["\'][^>]*>',  # Chapter div
-            ]
-            
-            for pattern in next_section_patterns:
-                matches = list(re.finditer(pattern, content[start_pos + 100:], re.IGNORECASE))
-                if matches:
-                    end_pos = start_pos + 100 + matches[0].start()
+            # Patterns are tried in priority order; only the first match of each is needed
+            for pattern in NEXT_SECTION_PATTERNS:
+                next_section = pattern.search(content, start_pos + 100)
+                if next_section:
+                    end_pos = next_section.start()
                     break
         
         extracted = content[start_pos:end_pos].strip()
@@ -365,18 +522,15 @@ class EpubExporter:
     
     def _extract_by_id_anchor(self, content: str, anchor: str) -> str:
         """Extract content by ID anchor"""
-        import re
-        
         # Find element with specified ID
-        id_pattern = rf'<[^>]+id=["\']?{re.escape(anchor)}["\']?[^>]*>'
-        match = re.search(id_pattern, content, re.IGNORECASE)
+        match = get_id_tag_pattern(anchor).search(content)
         
         if match:
             start_pos = match.start()
-            # Find next same-level or higher-level heading
-            next_heading = re.search(r'<h[1-4][^>]*>', content[start_pos + len(match.group()):])
+            # Find next same-level or higher-level heading, scanning on from the anchor tag
+            next_heading = NEXT_HEADING_RE.search(content, match.end())
             if next_heading:
-                end_pos = start_pos + len(match.group()) + next_heading.start()
+                end_pos = next_heading.start()
                 return content[start_pos:end_pos].strip()
             else:
                 return content[start_pos:].strip()
@@ -388,8 +542,7 @@ class EpubExporter:
         # If content is very long, try splitting based on headings
         if len(content) > 10000:  # If content exceeds 10KB
             # Try to find all headings
-            import re
-            headings = list(re.finditer(r'<h[1-4][^>]*>(.*?)</h[1-4]>', content, re.IGNORECASE | re.DOTALL))
+            headings = list(HEADING_BLOCK_RE.finditer(content))
             
             if len(headings) > 1:
                 # If multiple headings, return content between first and second heading
@@ -403,15 +556,14 @@ class EpubExporter:
     def _extract_title_from_content(self, content: str) -> Optional[str]:
         """Extract title from HTML content"""
         # Try to extract h1, h2 heading tags
-        title_patterns = [
-            r'<h[1-6][^>]*>(.*?)</h[1-6]>',
-            r'<title[^>]*>(.*?)</title>',
-        ]
-        
-        for pattern in title_patterns:
-            match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
+        for pattern in TITLE_PATTERNS:
+            # Titles are almost always near the top; only scan the whole
+            # chapter when the prefix has no complete match
+            match = pattern.search(content, 0, TITLE_SEARCH_PREFIX)
+            if not match and len(content) > TITLE_SEARCH_PREFIX:
+                match = pattern.search(content)
             if match:
-                title = re.sub(r'<[^>]+>', '', match.group(1)).strip()
+                title = HTML_TAG_RE.sub('', match.group(1)).strip()
                 if title:
                     return title
         return None
@@ -420,21 +572,13 @@ class EpubExporter:
         """Split content into multiple chapters based on headings"""
         chapters = []
         
-        # Try multiple heading patterns
-        heading_patterns = [
-            r'<h[1-3][^>]*>(.*?)</h[1-3]>',  # HTML heading tags
-            r'^#+\s+(.+)$',  # Markdown headings
-            r'^Chapter\s+\d+[:\s]*(.*)$',  # English chapter headings
-            r'^\d+[\.]\s*(.+)$',  # Numbered headings
-        ]
-        
         # First try HTML heading tag splitting
         html_chapters = self._split_by_html_headings(content)
         if html_chapters:
             return html_chapters
         
         # If HTML splitting fails, try text pattern splitting
-        text_chapters = self._split_by_text_patterns(content, heading_patterns)
+        text_chapters = self._split_by_text_patterns(content, TEXT_HEADING_RE)
         if text_chapters:
             return text_chapters
             
@@ -444,45 +588,35 @@ class EpubExporter:
     
     def _split_by_html_headings(self, content: str) -> List[Tuple[str, str, str]]:
         """Split content based on HTML heading tags"""
-        import re
-        from html import unescape
-        
-        chapters = []
-        
         # Find all h1-h3 headings
-        heading_pattern = r'<h([1-3])[^>]*>(.*?)</h\1>'
-        headings = list(re.finditer(heading_pattern, content, re.IGNORECASE | re.DOTALL))
+        headings = list(HTML_HEADING_RE.finditer(content))
         
         if len(headings) < 2:
             return []
         
-        for i, heading in enumerate(headings):
+        def heading_title(heading, number: int) -> str:
             # Extract heading text
-            title_html = heading.group(2)
-            title = re.sub(r'<[^>]+>', '', title_html)
-            title = unescape(title).strip()
-            
-            if not title:
-                title = f"Chapter {i + 1}"
-            
-            # Determine chapter content range
-            start_pos = heading.start()
-            end_pos = headings[i + 1].start() if i + 1 < len(headings) else len(content)
-            
-            chapter_content = content[start_pos:end_pos].strip()
-            
-            if chapter_content:
-                chapters.append((title, chapter_content, f"chapter_{i + 1}"))
+            title = html.unescape(HTML_TAG_RE.sub('', heading.group(2))).strip()
+            return title or f"Chapter {number}"
+        
+        # Each chapter runs from its heading to the start of the next one
+        ends = [heading.start() for heading in headings[1:]] + [len(content)]
+        sections = [
+            (i + 1, heading, content[heading.start():end].strip())
+            for i, (heading, end) in enumerate(zip(headings, ends))
+        ]
+        chapters = [
+            (heading_title(heading, number), chapter_content, f"chapter_{number}")
+            for number, heading, chapter_content in sections
+            if chapter_content
+        ]
         
         return chapters if len(chapters) > 1 else []
     
-    def _split_by_text_patterns(self, content: str, patterns: List[str]) -> List[Tuple[str, str, str]]:
+    def _split_by_text_patterns(self, content: str, heading_re: Pattern) -> List[Tuple[str, str, str]]:
         """Split content based on text patterns"""
-        import re
-        
-        # Remove HTML tags, convert to plain text
-        text_content = re.sub(r'<[^>]+>', '\n', content)
-        text_content = re.sub(r'\n+', '\n', text_content).strip()
+        # Remove HTML tags, convert to plain text (one line break per run of tags/newlines)
+        text_content = TAGS_AND_NEWLINES_RE.sub('\n', content).strip()
         
         lines = text_content.split('\n')
         chapters = []
@@ -495,15 +629,9 @@ class EpubExporter:
                 continue
                 
             # Check if heading line
-            is_heading = False
-            title = None
-            
-            for pattern in patterns:
-                match = re.match(pattern, line, re.IGNORECASE)
-                if match:
-                    is_heading = True
-                    title = match.group(1).strip() if match.groups() else line
-                    break
+            match = heading_re.match(line)
+            is_heading = match is not None
+            title = match.group(match.lastindex).strip() if match else None
             
             if is_heading and current_chapter:
                 # Save previous chapter
@@ -530,9 +658,9 @@ class EpubExporter:
     def _sanitize_filename(self, filename: str) -> str:
         """Clean filename, remove illegal characters"""
         # Remove or replace illegal characters
-        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+        filename = filename.translate(ILLEGAL_FILENAME_CHARS)
         # Remove extra spaces and dots
-        filename = re.sub(r'\s+', ' ', filename).strip()
+        filename = ' '.join(filename.split())
         filename = filename.strip('.')
         # Limit length
         if len(filename) > 100:
@@ -550,36 +678,193 @@ class EpubExporter:
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        chapters = self.get_chapters()
+        try:
+            chapters = self.iter_chapters()
+            first_chapter = next(chapters, None)
+            
+            if first_chapter is None:
+                print("⚠️  No chapter content found")
+                return
+            
+            print("📚 Chapters found, starting export...")
+            
+            # Export image resources
+            images_exported = self._export_images(output_path)
+            if images_exported:
+                print(f"🖼️  Exported {images_exported} image files")
+            
+            # Convert and write chapters a window at a time, so decoded text is
+            # held only for one window's chapters and the file being split
+            window_size = (os.cpu_count() or 1) * CHAPTERS_PER_WORKER
+            chapters = itertools.chain([first_chapter], chapters)
+            chapter_count = 0
+            failed_titles = []
+            
+            def on_exported(title, error):
+                if error is not None:
+                    failed_titles.append(title)
+            
+            while True:
+                window = list(itertools.islice(chapters, window_size))
+                if not window:
+                    break
+                self._export_chapter_window(window, chapter_count + 1, output_path, format_type,
+                                            on_exported=on_exported)
+                chapter_count += len(window)
+            
+            print(f"📚 Exported {chapter_count - len(failed_titles)} chapters")
+            if failed_titles:
+                print(f"⚠️  Failed to export {len(failed_titles)} chapters: {', '.join(failed_titles)}")
+            print(f"✅ Export complete! Files saved in: {output_path}")
+        finally:
+            # Decoded chapters and the book are no longer needed; free them
+            # now rather than when the exporter goes away
+            self.close()
+    
+    def _export_chapter_window(self, chapters: List[Tuple[str, str, str]], start_index: int,
+                               output_path: Path, format_type: str,
+                               on_exported: Optional[Callable[[str, Optional[Exception]], None]] = None,
+                               batch_size: Optional[int] = None,
+                               should_stop: Optional[Callable[[], bool]] = None) -> int:
+        """
+        Convert a window of chapters in parallel and write them, numbering from start_index
+        
+        Each pandoc batch is written as soon as it is converted.
         
-        if not chapters:
-            print("⚠️  No chapter content found")
-            return
+        Args:
+            on_exported: Called with each chapter's title and the error raised
+                while exporting it (None on success), batch by batch
+            batch_size: Maximum chapters per pandoc run (see _convert_chapters)
+            should_stop: Checked before each batch; once it returns True the
+                remaining batches are neither converted nor written
         
-        print(f"📚 Found {len(chapters)} chapters, starting export...")
+        Returns:
+            Number of chapters skipped because should_stop returned True
+        """
+        # Process image links in content
+        processed_contents = [
+            self._process_image_links(content, format_type) for _, content, _ in chapters
+        ]
         
-        # Export image resources
-        images_exported = self._export_images(output_path)
-        if images_exported:
-            print(f"🖼️  Exported {images_exported} image files")
+        handled = 0
         
-        # Create temporary directory for pandoc conversion
-        with tempfile.TemporaryDirectory() as temp_dir:
-            self.temp_dir = temp_dir
-            
-            for i, (title, content, chapter_id) in enumerate(chapters, 1):
+        def write_batch(offset, converted_chapters):
+            nonlocal handled
+            handled += len(converted_chapters)
+            for i, converted_content in enumerate(converted_chapters, offset):
+                title = chapters[i][0]
+                index = start_index + i
+                error = None
                 try:
-                    # Process image links in content
-                    processed_content = self._process_image_links(content, format_type)
-                    
-                    self._export_single_chapter(
-                        title, processed_content, i, output_path, format_type
-                    )
+                    if converted_content is None:
+                        # Batch conversion failed, convert this chapter on its own
+                        self._export_single_chapter(
+                            title, processed_contents[i], index, output_path, format_type
+                        )
+                    else:
+                        filename = self._chapter_filename(title, index, format_type)
+                        (output_path / filename).write_bytes(converted_content)
+                        print(f"✓ Exported: {filename}")
                 except Exception as e:
                     print(f"✗ Failed to export chapter '{title}': {e}")
+                    error = e
+                if on_exported:
+                    on_exported(title, error)
+        
+        # Convert chapters in parallel pandoc batches
+        self._convert_chapters(processed_contents, format_type, on_batch=write_batch,
+                               batch_size=batch_size, should_stop=should_stop)
+        return len(chapters) - handled
+    
+    def _convert_chapters(self, contents: List[str], format_type: str,
+                          on_batch: Optional[Callable[[int, List[Optional[bytes]]], None]] = None,
+                          batch_size: Optional[int] = None,
+                          should_stop: Optional[Callable[[], bool]] = None) -> List[Optional[bytes]]:
+        """
+        Convert chapters in parallel, one pandoc batch per CPU core
+        
+        Args:
+            contents: HTML content of each chapter
+            format_type: Output format ('markdown' or 'txt')
+            on_batch: Called in this thread as each batch finishes, with the
+                index of the batch's first chapter and its output
+            batch_size: Maximum chapters per pandoc run; smaller batches give
+                finer progress at the cost of more pandoc starts
+            should_stop: Checked before each batch starts; batches skipped
+                once it returns True are not passed to on_batch
+        
+        Returns:
+            UTF-8 encoded output of each chapter; None for chapters whose
+            batch could not be converted or was skipped
+        """
+        if not contents:
+            return []
+        
+        # Split chapters into contiguous batches, by default one per worker
+        workers = min(os.cpu_count() or 1, len(contents))
+        if batch_size is None:
+            batch_size = -(-len(contents) // workers)
+        starts = range(0, len(contents), batch_size)
+        
+        skipped = object()
+        
+        def convert_batch(batch):
+            if should_stop and should_stop():
+                return skipped
+            try:
+                return self._convert_chapters_batch(batch, format_type)
+            except Exception as e:
+                print(f"⚠️  Batch conversion failed, converting chapters one by one: {e}")
+                return None
+        
+        # Pandoc runs in subprocesses, so threads are enough to use all cores
+        converted = [None] * len(contents)
+        with ThreadPoolExecutor(max_workers=min(workers, len(starts))) as executor:
+            futures = {
+                executor.submit(convert_batch, contents[start:start + batch_size]): start
+                for start in starts
+            }
+            for future in as_completed(futures):
+                start = futures[future]
+                result = future.result()
+                if result is skipped:
                     continue
+                if result is None:
+                    result = [None] * min(batch_size, len(contents) - start)
+                converted[start:start + len(result)] = result
+                if on_batch:
+                    on_batch(start, result)
+        return converted
+    
+    def _convert_chapters_batch(self, contents: List[str], format_type: str) -> Optional[List[bytes]]:
+        """
+        Convert several chapters with a single pandoc invocation
+        
+        Chapters are joined with a sentinel paragraph, converted together and
+        split on the sentinel again.
+        
+        Args:
+            contents: HTML content of each chapter
+            format_type: Output format ('markdown' or 'txt')
+        
+        Returns:
+            UTF-8 encoded output of each chapter, or None if the output could
+            not be split back into the same number of chapters, or a chapter
+            cut out of a larger file left a code block or div open across the
+            separator
+        """
+        pandoc_format = 'markdown' if format_type.lower() == 'markdown' else 'plain'
+        separator = f"\n\n<p>{CHAPTER_SEPARATOR}</p>\n\n"
+        
+        converted = self._run_pandoc(separator.join(contents), pandoc_format)
         
-        print(f"✅ Export complete! Files saved in: {output_path}")
+        parts = CHAPTER_SEPARATOR_RE.split(converted)
+        if len(parts) != len(contents):
+            return None
+        if pandoc_format == 'markdown' and not all(markdown_blocks_closed(part) for part in parts):
+            return None
+        
+        return [part.strip(b'\n') + b'\n' for part in parts]
     
     def _export_images(self, output_path: Path) -> int:
         """Export all images from EPUB, maintaining original directory structure"""
@@ -587,25 +872,34 @@ class EpubExporter:
             return 0
         
         exported_count = 0
-        self.image_mapping = {}  # Store mapping from original path to new path
-        
-        for item in self.book.get_items():
-            if item.get_type() == ebooklib.ITEM_IMAGE:
+        self.image_mapping = {}
+        
+        # Collect image items in a single pass over the manifest
+        images = list(self.book.get_items_of_type(ebooklib.ITEM_IMAGE))
+        
+        # Create each target directory once (maintain directory structure)
+        for directory in {(output_path / item.get_name()).parent for item in images}:
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                # Reported per image when writing into it fails
+                pass
+        
+        def write_image(item):
+            # Save image
+            with open(output_path / item.get_name(), 'wb') as f:
+                f.write(item.get_content())
+        
+        # File writes release the GIL, so images are written concurrently;
+        # results are still recorded and reported in manifest order
+        with ThreadPoolExecutor(max_workers=IMAGE_WRITE_WORKERS) as executor:
+            futures = [executor.submit(write_image, item) for item in images]
+            for item, future in zip(images, futures):
                 try:
-                    # Get original image path
-                    original_path = item.get_name()
-                    
-                    # Create complete output path (maintain directory structure)
-                    image_output_path = output_path / original_path
-                    
-                    # Ensure directory exists
-                    image_output_path.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    # Save image
-                    with open(image_output_path, 'wb') as f:
-                        f.write(item.get_content())
+                    future.result()
                     
                     # Record mapping
+                    original_path = item.get_name()
                     self.image_mapping[original_path] = original_path
                     
                     exported_count += 1
@@ -618,70 +912,87 @@ class EpubExporter:
     
     def _process_image_links(self, content: str, format_type: str) -> str:
         """Process image links in content"""
-        import re
-        
         if format_type.lower() != 'markdown':
             return content
         
-        # Find all img tags
-        img_pattern = r'<img[^>]*src=["\']([^"\']+)["\'][^>]*>'
-        
-        def replace_img_tag(match):
-            img_tag = match.group(0)
-            src = match.group(1)
+        # Rebuild the content from the text between img tags and their
+        # Markdown replacements
+        parts = []
+        last_end = 0
+        for match in IMG_TAG_RE.finditer(content):
+            alt_text, src = match.groups()
             
             # Clean path (remove ../ etc)
-            clean_src = src
-            while clean_src.startswith('../'):
-                clean_src = clean_src[3:]
+            clean_src = PARENT_DIR_PREFIX_RE.sub('', src)
             
-            # Try to extract alt text
-            alt_match = re.search(r'alt=["\']([^"\']*)["\']', img_tag, re.IGNORECASE)
-            alt_text = alt_match.group(1) if alt_match else "Image"
-            
-            # Check if mapping exists
-            if hasattr(self, 'image_mapping') and clean_src in self.image_mapping:
-                image_path = self.image_mapping[clean_src]
-            else:
-                # If no mapping, use original path
-                image_path = clean_src
+            # Check if mapping exists, otherwise use original path
+            image_path = self.image_mapping.get(clean_src, clean_src)
             
-            # Return Markdown format image link (using relative path)
-            return f'![{alt_text}]({image_path})'
+            # Markdown format image link (using relative path); alt text was
+            # captured with the tag itself
+            parts.append(content[last_end:match.start()])
+            parts.append(f'![{alt_text if alt_text is not None else "Image"}]({image_path})')
+            last_end = match.end()
         
-        # Replace all img tags
-        processed_content = re.sub(img_pattern, replace_img_tag, content, flags=re.IGNORECASE)
+        if not parts:
+            return content
         
-        return processed_content
+        parts.append(content[last_end:])
+        return ''.join(parts)
     
-    def _export_single_chapter(self, title: str, content: str, index: int, 
-                             output_path: Path, format_type: str) -> None:
-        """Export single chapter"""
+    def _run_pandoc(self, content: str, pandoc_format: str) -> bytes:
+        """
+        Convert HTML content to the target format with pandoc
+        
+        Content is piped straight to the pandoc binary located by pypandoc.
+        pypandoc.convert_text would start pandoc two more times per call to
+        list the supported formats before converting.
+        
+        Args:
+            content: HTML content
+            pandoc_format: Pandoc output format ('markdown' or 'plain')
+        
+        Returns:
+            Pandoc's UTF-8 output, ready to be written without re-encoding
+        """
+        result = subprocess.run(
+            [pypandoc.get_pandoc_path(), '--from=html', f'--to={pandoc_format}',
+             '--wrap=none'],  # Don't auto wrap
+            input=content.encode('utf-8'),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            # Like pypandoc, keep Windows from opening a console per run
+            # (subprocess.CREATE_NO_WINDOW only exists from Python 3.7)
+            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0x08000000) if sys.platform == 'win32' else 0
+        )
+        if result.returncode != 0:
+            error = result.stderr.decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"Pandoc exited with code {result.returncode}: {error}")
+        
+        # Pandoc writes native line endings; normalize them to LF
+        return result.stdout.replace(b'\r\n', b'\n')
+    
+    def _chapter_filename(self, title: str, index: int, format_type: str) -> str:
+        """Generate output filename for a chapter"""
         # Clean title as filename
         safe_title = self._sanitize_filename(title)
-        
-        # Generate filename
-        if format_type.lower() == 'markdown':
-            filename = f"{index:02d}_{safe_title}.md"
-            pandoc_format = 'markdown'
-        else:
-            filename = f"{index:02d}_{safe_title}.txt"
-            pandoc_format = 'plain'
+        extension = 'md' if format_type.lower() == 'markdown' else 'txt'
+        return f"{index:02d}_{safe_title}.{extension}"
+    
+    def _export_single_chapter(self, title: str, content: str, index: int,
+                             output_path: Path, format_type: str) -> None:
+        """Export single chapter; raises if neither pandoc nor the fallback wrote it"""
+        filename = self._chapter_filename(title, index, format_type)
+        pandoc_format = 'markdown' if format_type.lower() == 'markdown' else 'plain'
         
         output_file = output_path / filename
         
         try:
             # Use pandoc to convert HTML to target format
-            converted_content = pypandoc.convert_text(
-                content,
-                pandoc_format,
-                format='html',
-                extra_args=['--wrap=none']  # Don't auto wrap
-            )
+            converted_content = self._run_pandoc(content, pandoc_format)
             
             # Write to file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(converted_content)
+            output_file.write_bytes(converted_content)
             
             print(f"✓ Exported: {filename}")
             
@@ -691,26 +1002,26 @@ class EpubExporter:
             self._fallback_export(content, output_file, title)
     
     def _fallback_export(self, content: str, output_file: Path, title: str) -> None:
-        """Fallback export method (simple HTML tag cleaning)"""
+        """Fallback export method (simple HTML tag cleaning); raises if the file could not be written"""
         try:
             # Simple HTML tag cleaning
-            import html
-            
-            # Remove HTML tags
-            clean_content = re.sub(r'<[^>]+>', '', content)
+            # Remove HTML tags, and script/style blocks whose text is not
+            # chapter content, in one pass
+            clean_content = MARKUP_RE.sub('', content)
             # Decode HTML entities
-            clean_content = html.unescape(clean_content)
+            if '&' in clean_content:
+                clean_content = html.unescape(clean_content)
             # Clean extra whitespace
-            clean_content = re.sub(r'\n\s*\n', '\n\n', clean_content)
+            clean_content = BLANK_LINES_RE.sub('\n\n', clean_content)
             clean_content = clean_content.strip()
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(clean_content)
+            output_file.write_bytes(clean_content.encode('utf-8'))
             
             print(f"✓ Exported (fallback method): {output_file.name}")
             
         except Exception as e:
             print(f"✗ Fallback export also failed: {e}")
+            raise
 
 
 @click.command()
@@ -8,13 +8,23 @@ EPUB 章节导出工具 - 图形用户界面
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
+import itertools
 import os
 import sys
 from pathlib import Path
-from epub_exporter import EpubExporter
+from epub_exporter import EpubExporter, CHAPTERS_PER_WORKER
 import queue
 import time
 
+# Log lines kept in the log box; older lines are trimmed once the box
+# grows LOG_TRIM_SLACK lines past this, so trimming is not done per line
+LOG_MAX_LINES = 2000
+LOG_TRIM_SLACK = 500
+
+# Chapters per pandoc run during export; smaller than the command line's
+# batches so progress advances in steps while every core stays busy
+EXPORT_BATCH_SIZE = 4
+
 
 class EpubExporterGUI:
     """EPUB 导出工具图形界面"""
@@ -35,14 +45,36 @@ class EpubExporterGUI:
         self.progress_var = tk.DoubleVar()
         self.status_var = tk.StringVar(value="就绪")
         
+        # Path objects and existence checks are refreshed when the paths
+        # change, so button callbacks don't stat the filesystem on every click
+        self.epub_file_path.trace_add('write', self._on_epub_changed)
+        self.output_dir_path.trace_add('write', self._on_output_changed)
+        self._on_epub_changed()
+        self._on_output_changed()
+        
         # Message queue for thread communication
         self.message_queue = queue.Queue()
+        self._queue_event_pending = False  # A <<QueueMessage>> wakeup is on its way
+        self._see_scheduled = False  # Pending log scroll via after_idle
+        
+        # Parsed book shared by preview, debug and export: (key, exporter, chapters)
+        self.exporter_cache = None
+        self.exporter_lock = threading.Lock()
+        
+        # Preview, debug and export jobs run one at a time on a single worker
+        # thread; stop_export sets the event and the export checks it
+        self._jobs = queue.Queue()
+        self._stop_event = threading.Event()
+        self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+        self._worker.start()
         
         # Create interface
         self.create_widgets()
         
-        # Start message processing
-        self.process_queue()
+        # Start message processing: workers wake the event loop through a
+        # virtual event, the periodic poll is only a safety net
+        self.root.bind('<<QueueMessage>>', lambda event: self.process_queue())
+        self.poll_queue()
         
     def setup_styles(self):
         """设置界面样式"""
@@ -179,33 +211,35 @@ class EpubExporterGUI:
         ttk.Button(select_frame, text="全不选", command=self.deselect_all_chapters).pack(side=tk.LEFT, padx=(5, 0))
         ttk.Button(select_frame, text="反选", command=self.invert_chapter_selection).pack(side=tk.LEFT, padx=(5, 0))
         
-        # Create Treeview for displaying chapters
-        columns = ('选择', '序号', '章节标题', '内容长度')
-        self.chapter_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=8)
+        # Create Treeview for displaying chapters (ASCII column ids, Chinese headings)
+        columns = {'select': '选择', 'index': '序号', 'title': '章节标题', 'length': '内容长度'}
+        self.chapter_tree = ttk.Treeview(list_frame, columns=tuple(columns), show='headings', height=8)
         
         # Set column headers
-        for col in columns:
-            self.chapter_tree.heading(col, text=col)
+        for col, heading in columns.items():
+            self.chapter_tree.heading(col, text=heading)
             
         # Set column widths
-        self.chapter_tree.column('选择', width=50, anchor=tk.CENTER)
-        self.chapter_tree.column('序号', width=60, anchor=tk.CENTER)
-        self.chapter_tree.column('章节标题', width=250, anchor=tk.W)
-        self.chapter_tree.column('内容长度', width=100, anchor=tk.CENTER)
+        self.chapter_tree.column('select', width=50, anchor=tk.CENTER)
+        self.chapter_tree.column('index', width=60, anchor=tk.CENTER)
+        self.chapter_tree.column('title', width=250, anchor=tk.W)
+        self.chapter_tree.column('length', width=100, anchor=tk.CENTER)
         
         # Bind double-click event to toggle selection
         self.chapter_tree.bind('<Double-1>', self.toggle_chapter_selection)
         
         # Add scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.chapter_tree.yview)
-        self.chapter_tree.configure(yscrollcommand=scrollbar.set)
+        self.chapter_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.chapter_tree.yview)
+        self.chapter_tree.configure(yscrollcommand=self.chapter_scrollbar.set)
         
         # Layout
         self.chapter_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        self.chapter_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
         
         # Store chapter selection states
         self.chapter_selections = {}
+        self.chapter_load_token = None  # Identifies the preview filling the list
+        self.chapter_list_key = None  # exporter_key() of the listed chapters
         
     def create_control_area(self, parent, row):
         """创建控制按钮区域"""
@@ -265,17 +299,12 @@ class EpubExporterGUI:
         initial_dir = None
         
         # If file already selected, start from that file's directory
-        current_epub = self.epub_file_path.get()
-        if current_epub and Path(current_epub).exists():
-            initial_dir = str(Path(current_epub).parent)
+        if self._epub_exists:
+            initial_dir = str(self._epub_path_obj.parent)
         
         # If output directory is set, can also start from there
-        elif self.output_dir_path.get():
-            output_path = Path(self.output_dir_path.get())
-            if output_path.exists():
-                initial_dir = str(output_path)
-            elif output_path.parent.exists():
-                initial_dir = str(output_path.parent)
+        elif self._output_initial_dir:
+            initial_dir = self._output_initial_dir
         
         # Open file selection dialog
         if initial_dir:
@@ -291,6 +320,7 @@ class EpubExporterGUI:
             )
         if file_path:
             self.epub_file_path.set(file_path)
+            self.exporter_cache = None  # Release the previously parsed book
             
             # Auto-set output directory to EPUB filename (without extension) folder
             epub_path = Path(file_path)
@@ -310,17 +340,12 @@ class EpubExporterGUI:
         initial_dir = None
         
         # If EPUB file already selected, start from that file's directory
-        epub_path = self.epub_file_path.get()
-        if epub_path and Path(epub_path).exists():
-            initial_dir = str(Path(epub_path).parent)
+        if self._epub_exists:
+            initial_dir = str(self._epub_path_obj.parent)
         
         # If output directory already set, start from that directory
-        elif self.output_dir_path.get():
-            current_output = Path(self.output_dir_path.get())
-            if current_output.exists():
-                initial_dir = str(current_output)
-            elif current_output.parent.exists():
-                initial_dir = str(current_output.parent)
+        elif self._output_initial_dir:
+            initial_dir = self._output_initial_dir
         
         # Open folder selection dialog
         if initial_dir:
@@ -332,6 +357,28 @@ class EpubExporterGUI:
             self.output_dir_path.set(dir_path)
             self.log(f"输出目录: {dir_path}")
             
+    def _on_epub_changed(self, *args):
+        """EPUB 路径变化时缓存 Path 对象和文件是否存在"""
+        epub_path = self.epub_file_path.get()
+        self._epub_path_obj = Path(epub_path) if epub_path else None
+        self._epub_exists = bool(epub_path) and self._epub_path_obj.exists()
+        
+    def check_epub_exists(self):
+        """重新检查 EPUB 文件是否存在并更新缓存（文件可能在选择后被创建或删除）"""
+        self._epub_exists = self._epub_path_obj is not None and self._epub_path_obj.exists()
+        return self._epub_exists
+        
+    def _on_output_changed(self, *args):
+        """输出目录变化时缓存浏览对话框的初始目录"""
+        output_dir = self.output_dir_path.get()
+        self._output_initial_dir = None
+        if output_dir:
+            output_path = Path(output_dir)
+            if output_path.exists():
+                self._output_initial_dir = str(output_path)
+            elif output_path.parent.exists():
+                self._output_initial_dir = str(output_path.parent)
+            
     def preview_chapters(self):
         """预览章节"""
         epub_path = self.epub_file_path.get()
@@ -339,7 +386,7 @@ class EpubExporterGUI:
             messagebox.showwarning("警告", "请先选择 EPUB 文件")
             return
             
-        if not Path(epub_path).exists():
+        if not self.check_epub_exists():
             messagebox.showerror("错误", "EPUB 文件不存在")
             return
             
@@ -348,8 +395,7 @@ class EpubExporterGUI:
             self.status_var.set("加载中...")
             
             # Load chapters in background thread
-            threading.Thread(target=self._load_chapters_thread, 
-                           args=(epub_path,), daemon=True).start()
+            self._jobs.put((self._load_chapters_thread, (epub_path,)))
             
         except Exception as e:
             self.log(f"预览失败: {e}")
@@ -358,31 +404,93 @@ class EpubExporterGUI:
     def _load_chapters_thread(self, epub_path):
         """在后台线程中加载章节"""
         try:
-            exporter = EpubExporter(epub_path)
-            chapters = exporter.get_chapters()
+            # Rows are sent one by one as chapters are parsed, so the list
+            # fills in while a large book is still loading. Messages carry a
+            # load token so rows from an older, overlapping preview are ignored,
+            # and the file key the rows belong to. Only (title, length,
+            # chapter_id) goes to the GUI; content is extracted again at export
+            load_token = object()
+            key = self.exporter_key(epub_path)
+            self._post(('chapters_started', (load_token, key)))
+            
+            exporter, chapters_meta = self.get_exporter(
+                key, on_chapter=lambda meta: self._post(('chapter_row', (load_token, meta)))
+            )
             
             # Send result through queue
-            self.message_queue.put(('chapters_loaded', chapters))
+            self._post(('chapters_loaded', (load_token, chapters_meta)))
             
         except Exception as e:
-            self.message_queue.put(('error', f"加载章节失败: {e}"))
+            self._post(('error', f"加载章节失败: {e}"))
             
-    def update_chapter_list(self, chapters):
-        """更新章节列表显示"""
-        # Clear existing items
-        for item in self.chapter_tree.get_children():
-            self.chapter_tree.delete(item)
+    def exporter_key(self, epub_path):
+        """返回标识 EPUB 文件及其版本的缓存键"""
+        stat = os.stat(epub_path)
+        return (os.path.abspath(epub_path), stat.st_mtime_ns, stat.st_size)
+        
+    def get_exporter(self, key, on_chapter=None):
+        """
+        获取导出器和章节信息 (title, length, chapter_id)，文件未改变时复用上次的解析结果
+        
+        key: exporter_key() 返回的缓存键
+        on_chapter: 可选回调，按顺序对每个章节信息调用一次（解析时边解析边回调）
+        """
+        # Parsing happens under the lock so concurrent actions never parse twice.
+        # Only chapter metadata is cached; content is dropped once measured
+        with self.exporter_lock:
+            if self.exporter_cache is None or self.exporter_cache[0] != key:
+                exporter = EpubExporter(key[0])
+                chapters_meta = []
+                for title, content, chapter_id in exporter.iter_chapters():
+                    meta = (title, len(content), chapter_id)
+                    chapters_meta.append(meta)
+                    if on_chapter:
+                        on_chapter(meta)
+                self.exporter_cache = (key, exporter, chapters_meta)
+                return exporter, chapters_meta
+            _, exporter, chapters_meta = self.exporter_cache
+        
+        # Already parsed: replay the cached chapter metadata
+        if on_chapter:
+            for meta in chapters_meta:
+                on_chapter(meta)
+        return exporter, chapters_meta
+            
+    def start_chapter_list(self, load_token, key):
+        """清空章节列表，准备接收新的章节"""
+        self.chapter_load_token = load_token
+        self.chapter_list_key = key  # File version the listed chapters come from
+        
+        # Clear existing items in a single call
+        self.chapter_tree.delete(*self.chapter_tree.get_children())
         
         # Reset selection states
         self.chapter_selections = {}
-        self.chapters_data = chapters  # Save chapter data
-            
-        # Add chapters
-        for i, (title, content, chapter_id) in enumerate(chapters, 1):
-            content_length = f"{len(content):,} 字符"
-            item_id = self.chapter_tree.insert('', 'end', values=("☐", i, title, content_length))
-            self.chapter_selections[item_id] = False  # Default unselected
-            
+        
+    def add_chapter_rows(self, rows):
+        """向章节列表追加一批章节"""
+        chapters = [chapter for load_token, chapter in rows if load_token is self.chapter_load_token]
+        if not chapters:
+            return
+        
+        # Detach the scrollbar while inserting so it is only updated once
+        # for the whole batch instead of once per row
+        self.chapter_tree.configure(yscrollcommand='')
+        try:
+            start = len(self.chapter_selections) + 1
+            for i, (title, length, chapter_id) in enumerate(chapters, start):
+                content_length = f"{length:,} 字符"
+                item_id = self.chapter_tree.insert('', 'end', values=("☐", i, title, content_length))
+                self.chapter_selections[item_id] = False  # Default unselected
+        finally:
+            self.chapter_tree.configure(yscrollcommand=self.chapter_scrollbar.set)
+            self.chapter_scrollbar.set(*self.chapter_tree.yview())
+        
+    def update_chapter_list(self, load_token, chapters):
+        """章节加载完成，更新章节统计"""
+        if load_token is not self.chapter_load_token:
+            return  # A newer preview has taken over the list
+        
         self.chapter_count_label.config(text=f"共找到 {len(chapters)} 个章节")
         self.log(f"预览完成，共 {len(chapters)} 个章节")
         self.status_var.set("预览完成")
@@ -396,25 +504,19 @@ class EpubExporterGUI:
             self.chapter_selections[item] = new_state
             
             # Update display
-            values = list(self.chapter_tree.item(item, 'values'))
-            values[0] = "☑" if new_state else "☐"
-            self.chapter_tree.item(item, values=values)
+            self.chapter_tree.set(item, 'select', "☑" if new_state else "☐")
     
     def select_all_chapters(self):
         """全选章节"""
         for item in self.chapter_tree.get_children():
             self.chapter_selections[item] = True
-            values = list(self.chapter_tree.item(item, 'values'))
-            values[0] = "☑"
-            self.chapter_tree.item(item, values=values)
+            self.chapter_tree.set(item, 'select', "☑")
     
     def deselect_all_chapters(self):
         """全不选章节"""
         for item in self.chapter_tree.get_children():
             self.chapter_selections[item] = False
-            values = list(self.chapter_tree.item(item, 'values'))
-            values[0] = "☐"
-            self.chapter_tree.item(item, values=values)
+            self.chapter_tree.set(item, 'select', "☐")
     
     def invert_chapter_selection(self):
         """反选章节"""
@@ -422,20 +524,16 @@ class EpubExporterGUI:
             current_state = self.chapter_selections.get(item, False)
             new_state = not current_state
             self.chapter_selections[item] = new_state
-            values = list(self.chapter_tree.item(item, 'values'))
-            values[0] = "☑" if new_state else "☐"
-            self.chapter_tree.item(item, values=values)
+            self.chapter_tree.set(item, 'select', "☑" if new_state else "☐")
     
     def get_selected_chapters(self):
-        """获取选中的章节"""
-        selected_chapters = []
+        """获取选中章节的索引（从 0 开始）"""
+        selected_indices = []
         for item in self.chapter_tree.get_children():
             if self.chapter_selections.get(item, False):
-                values = self.chapter_tree.item(item, 'values')
-                chapter_index = int(values[1]) - 1  # Convert to 0-based index
-                if hasattr(self, 'chapters_data') and chapter_index < len(self.chapters_data):
-                    selected_chapters.append(self.chapters_data[chapter_index])
-        return selected_chapters
+                chapter_index = int(self.chapter_tree.set(item, 'index')) - 1  # Convert to 0-based index
+                selected_indices.append(chapter_index)
+        return selected_indices
     
     def debug_epub_structure(self):
         """调试 EPUB 结构"""
@@ -444,7 +542,7 @@ class EpubExporterGUI:
             messagebox.showwarning("警告", "请先选择 EPUB 文件")
             return
             
-        if not Path(epub_path).exists():
+        if not self.check_epub_exists():
             messagebox.showerror("错误", "EPUB 文件不存在")
             return
             
@@ -452,8 +550,7 @@ class EpubExporterGUI:
             self.log("开始调试分析 EPUB 结构...")
             
             # Debug analysis in background thread
-            threading.Thread(target=self._debug_epub_thread, 
-                           args=(epub_path,), daemon=True).start()
+            self._jobs.put((self._debug_epub_thread, (epub_path,)))
             
         except Exception as e:
             self.log(f"调试分析失败: {e}")
@@ -462,16 +559,16 @@ class EpubExporterGUI:
     def _debug_epub_thread(self, epub_path):
         """在后台线程中进行调试分析"""
         try:
-            exporter = EpubExporter(epub_path)
+            exporter, _ = self.get_exporter(self.exporter_key(epub_path))
             
             # Get chapters and enable debug mode
-            self.message_queue.put(('log', "正在进行详细的 EPUB 结构分析..."))
+            self._post(('log', "正在进行详细的 EPUB 结构分析..."))
             chapters = exporter.get_chapters(debug=True)
             
-            self.message_queue.put(('log', "调试分析完成！请查看终端输出获取详细信息。"))
+            self._post(('log', "调试分析完成！请查看终端输出获取详细信息。"))
             
         except Exception as e:
-            self.message_queue.put(('error', f"调试分析失败: {e}"))
+            self._post(('error', f"调试分析失败: {e}"))
         
     def start_export(self):
         """开始导出"""
@@ -484,13 +581,13 @@ class EpubExporterGUI:
             messagebox.showwarning("警告", "请先选择 EPUB 文件")
             return
             
-        if not Path(epub_path).exists():
+        if not self.check_epub_exists():
             messagebox.showerror("错误", "EPUB 文件不存在")
             return
             
         # If output directory is empty, use EPUB filename (without extension) folder
         if not output_dir:
-            epub_path_obj = Path(epub_path)
+            epub_path_obj = self._epub_path_obj
             epub_name = epub_path_obj.stem  # Get filename without extension
             output_dir = str(epub_path_obj.parent / epub_name)
             self.output_dir_path.set(output_dir)
@@ -506,79 +603,107 @@ class EpubExporterGUI:
         self.log_text.delete(1.0, tk.END)
         self.log("开始导出...")
         
+        # The selection is read here on the Tk thread, together with the
+        # file version the listed chapters were parsed from
+        selected_indices = self.get_selected_chapters()
+        selection_key = self.chapter_list_key if selected_indices else None
+        
         # Execute export in background thread
-        self.export_thread = threading.Thread(
-            target=self._export_thread,
-            args=(epub_path, output_dir, export_format),
-            daemon=True
-        )
-        self.export_thread.start()
-        
-    def _export_thread(self, epub_path, output_dir, export_format):
+        self._stop_event.clear()
+        self._jobs.put((self._export_thread,
+                        (epub_path, output_dir, export_format, selected_indices, selection_key)))
+        
+    def _export_thread(self, epub_path, output_dir, export_format, selected_indices, selection_key):
         """在后台线程中执行导出"""
         try:
-            exporter = EpubExporter(epub_path)
+            key = self.exporter_key(epub_path)
+            if selected_indices and key != selection_key:
+                # Indices refer to another file or an older version of this one
+                self._post(('error', "EPUB 文件已更改，与预览的章节列表不一致，请重新预览后再选择章节"))
+                return
             
             # Get chapters to export
-            self.message_queue.put(('log', "正在解析 EPUB 文件..."))
-            
-            # Check if there are selected chapters
-            selected_chapters = self.get_selected_chapters()
-            if selected_chapters:
-                chapters = selected_chapters
-                self.message_queue.put(('log', f"将导出选中的 {len(chapters)} 个章节"))
+            self._post(('log', "正在解析 EPUB 文件..."))
+            exporter, chapters_meta = self.get_exporter(key)
+            
+            # Chapter content is extracted again from the parsed book as it is
+            # exported; the chapter list only holds metadata
+            chapters = exporter.iter_chapters()
+            if selected_indices:
+                wanted = set(selected_indices)
+                chapters = (chapter for i, chapter in enumerate(chapters) if i in wanted)
+                total = len(wanted)
+                self._post(('log', f"将导出选中的 {total} 个章节"))
             else:
                 # If no chapters selected, export all chapters
-                chapters = exporter.get_chapters()
-                self.message_queue.put(('log', f"未选择特定章节，将导出所有 {len(chapters)} 个章节"))
+                total = len(chapters_meta)
+                self._post(('log', f"未选择特定章节，将导出所有 {total} 个章节"))
             
-            if not chapters:
-                self.message_queue.put(('error', "未找到任何章节"))
+            if not total:
+                self._post(('error', "未找到任何章节"))
                 return
             
             # Create output directory
-            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            output_path = Path(output_dir)
+            output_path.mkdir(parents=True, exist_ok=True)
             
             # Export image resources
-            self.message_queue.put(('log', "正在导出图片资源..."))
+            self._post(('log', "正在导出图片资源..."))
             try:
-                images_exported = exporter._export_images(Path(output_dir))
+                images_exported = exporter._export_images(output_path)
                 if images_exported > 0:
-                    self.message_queue.put(('log', f"✅ 导出了 {images_exported} 个图片文件"))
+                    self._post(('log', f"✅ 导出了 {images_exported} 个图片文件"))
                 else:
-                    self.message_queue.put(('log', "📷 未找到图片资源"))
+                    self._post(('log', "📷 未找到图片资源"))
             except Exception as e:
-                self.message_queue.put(('log', f"⚠️ 图片导出失败: {e}"))
-            
-            # Export each chapter
-            for i, (title, content, chapter_id) in enumerate(chapters, 1):
-                try:
-                    # Update progress
-                    progress = (i / len(chapters)) * 100
-                    self.message_queue.put(('progress', progress))
-                    self.message_queue.put(('status', f"导出章节 {i}/{len(chapters)}: {title}"))
-                    self.message_queue.put(('log', f"正在导出: {title}"))
-                    
-                    # Process image links
-                    processed_content = exporter._process_image_links(content, export_format)
-                    
-                    # Export single chapter
-                    exporter._export_single_chapter(title, processed_content, i, Path(output_dir), export_format)
-                    
-                except Exception as e:
-                    self.message_queue.put(('log', f"导出章节 '{title}' 失败: {e}"))
+                self._post(('log', f"⚠️ 图片导出失败: {e}"))
+            
+            done = 0
+            exported = 0  # Chapters written successfully
+            
+            def on_exported(title, error):
+                nonlocal done, exported
+                done += 1
+                if error is None:
+                    exported += 1
+                    self._post(('log', f"已导出: {title}"))
+                else:
+                    self._post(('log', f"导出章节 '{title}' 失败: {error}"))
+                
+                # Update progress
+                self._post(('progress', (done / total) * 100))
+                self._post(('status', f"导出章节 {done}/{total}: {title}"))
+            
+            # Export chapters a window at a time: each window is converted in
+            # parallel batches of a few chapters, written and reported as each
+            # batch finishes. A stop request skips the batches not yet started
+            window_size = (os.cpu_count() or 1) * CHAPTERS_PER_WORKER
+            for start in range(0, total, window_size):
+                window = list(itertools.islice(chapters, window_size))
+                skipped = exporter._export_chapter_window(
+                    window, start + 1, output_path, export_format,
+                    on_exported=on_exported, batch_size=EXPORT_BATCH_SIZE,
+                    should_stop=self._stop_event.is_set
+                )
+                
+                if skipped:
+                    self._post(('export_stopped', exported))
+                    return
                     
             # 导出完成
-            self.message_queue.put(('export_complete', output_dir))
+            self._post(('export_complete', output_dir))
             
         except Exception as e:
-            self.message_queue.put(('error', f"导出失败: {e}"))
+            self._post(('error', f"导出失败: {e}"))
             
     def stop_export(self):
         """停止导出"""
+        # The export finishes the pandoc batches already running, skips the
+        # rest and reports back with 'export_stopped', which resets the UI
+        self._stop_event.set()
+        self.stop_btn.config(state=tk.DISABLED)
         self.status_var.set("正在停止...")
         self.log("用户取消导出")
-        self.reset_ui_state()
         
     def reset_ui_state(self):
         """重置界面状态"""
@@ -589,6 +714,7 @@ class EpubExporterGUI:
         
     def clear_all(self):
         """清除所有内容"""
+        self.exporter_cache = None
         self.epub_file_path.set("")
         self.output_dir_path.set("")  # 清空输出目录
         self.export_format.set("markdown")
@@ -596,6 +722,8 @@ class EpubExporterGUI:
         # 清空章节列表
         for item in self.chapter_tree.get_children():
             self.chapter_tree.delete(item)
+        self.chapter_load_token = None  # Drop rows of a preview still running
+        self.chapter_list_key = None
             
         self.chapter_count_label.config(text="")
         
@@ -627,44 +755,121 @@ EPUB 章节导出工具 v1.0
         """
         messagebox.showinfo("关于", about_text.strip())
         
-    def log(self, message):
-        """添加日志消息"""
+    def format_log(self, message):
+        """格式化日志消息"""
         timestamp = time.strftime("%H:%M:%S")
-        log_message = f"[{timestamp}] {message}\n"
+        return f"[{timestamp}] {message}\n"
         
-        self.log_text.insert(tk.END, log_message)
+    def log(self, message):
+        """添加日志消息"""
+        self.append_log(self.format_log(message))
+        
+    def append_log(self, text):
+        """向日志框追加已格式化的文本"""
+        # Redrawing is left to the event loop instead of forcing it per line
+        self.log_text.insert(tk.END, text)
+        
+        # Keep the log box bounded
+        lines = int(self.log_text.index('end-1c').split('.')[0])
+        if lines > LOG_MAX_LINES + LOG_TRIM_SLACK:
+            self.log_text.delete('1.0', f'{lines - LOG_MAX_LINES}.0')
+        
+        # Scroll to the end once when the loop goes idle, however many
+        # lines were appended in between
+        if not self._see_scheduled:
+            self._see_scheduled = True
+            self.root.after_idle(self.scroll_log_to_end)
+            
+    def scroll_log_to_end(self):
+        """滚动日志框到末尾"""
+        self._see_scheduled = False
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        
+    def _worker_loop(self):
+        """后台工作线程：依次执行预览、调试和导出任务"""
+        while True:
+            target, args = self._jobs.get()
+            # A failing job must not take the only worker thread down with it
+            try:
+                target(*args)
+            except Exception as e:
+                self._post(('error', f"后台任务失败: {e}"))
+            
+    def _post(self, message):
+        """从后台线程发送消息，并唤醒界面线程处理"""
+        self.message_queue.put(message)
+        
+        # One pending wakeup is enough, process_queue drains everything
+        if not self._queue_event_pending:
+            self._queue_event_pending = True
+            try:
+                self.root.event_generate('<<QueueMessage>>', when='tail')
+            except (RuntimeError, tk.TclError):
+                pass  # Event loop not running yet; poll_queue picks it up
+                
+    def poll_queue(self):
+        """定时兜底检查消息队列"""
+        self.process_queue()
+        self.root.after(500, self.poll_queue)
         
     def process_queue(self):
         """处理消息队列"""
+        self._queue_event_pending = False
+        
+        # Drain every pending message; log lines, progress and status are
+        # coalesced and applied once per tick, other messages in arrival order
+        log_lines = []
+        updates = {}
         try:
             while True:
                 message_type, data = self.message_queue.get_nowait()
                 
-                if message_type == 'chapters_loaded':
-                    self.update_chapter_list(data)
-                elif message_type == 'log':
-                    self.log(data)
-                elif message_type == 'progress':
-                    self.progress_var.set(data)
-                elif message_type == 'status':
-                    self.status_var.set(data)
-                elif message_type == 'error':
-                    self.log(f"错误: {data}")
-                    messagebox.showerror("错误", data)
-                    self.reset_ui_state()
-                elif message_type == 'export_complete':
-                    self.log("✅ 导出完成！")
-                    self.status_var.set("导出完成")
-                    self.reset_ui_state()
-                    messagebox.showinfo("完成", f"导出完成！\n文件保存在: {data}")
+                if message_type == 'log':
+                    log_lines.append(self.format_log(data))
+                elif message_type in ('progress', 'status'):
+                    updates[message_type] = data
+                elif message_type == 'chapter_row':
+                    updates.setdefault('chapter_rows', []).append(data)
+                else:
+                    self.apply_queued_updates(log_lines, updates)
+                    log_lines, updates = [], {}
+                    self.handle_message(message_type, data)
                     
         except queue.Empty:
             pass
-            
-        # 每100ms检查一次队列
-        self.root.after(100, self.process_queue)
+        
+        self.apply_queued_updates(log_lines, updates)
+        
+    def apply_queued_updates(self, log_lines, updates):
+        """一次性应用合并后的日志、进度、状态和章节行更新"""
+        if 'chapter_rows' in updates:
+            self.add_chapter_rows(updates['chapter_rows'])
+        if log_lines:
+            self.append_log("".join(log_lines))
+        if 'progress' in updates:
+            self.progress_var.set(updates['progress'])
+        if 'status' in updates:
+            self.status_var.set(updates['status'])
+        
+    def handle_message(self, message_type, data):
+        """处理单条非合并消息"""
+        if message_type == 'chapters_started':
+            self.start_chapter_list(*data)
+        elif message_type == 'chapters_loaded':
+            self.update_chapter_list(*data)
+        elif message_type == 'error':
+            self.log(f"错误: {data}")
+            messagebox.showerror("错误", data)
+            self.reset_ui_state()
+        elif message_type == 'export_stopped':
+            self.log(f"导出已停止，已导出 {data} 个章节")
+            self.reset_ui_state()
+        elif message_type == 'export_complete':
+            self._on_output_changed()  # The output directory exists now
+            self.log("✅ 导出完成！")
+            self.status_var.set("导出完成")
+            self.reset_ui_state()
+            messagebox.showinfo("完成", f"导出完成！\n文件保存在: {data}")
 
 
 def main():